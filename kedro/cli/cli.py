@@ -40,8 +40,9 @@ import traceback
 import webbrowser
 from collections import defaultdict
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 import click
 import pkg_resources
@@ -97,6 +98,13 @@ ENTRY_POINT_GROUPS = {
 }
 
 
+@lru_cache(maxsize=None)
+def _get_entry_points(group: str) -> Tuple[pkg_resources.EntryPoint, ...]:
+    """Scans the installed distributions for the entry points of a group
+    only once per process, as the scan is slow on large environments."""
+    return tuple(pkg_resources.iter_entry_points(group=group))
+
+
 @cli.command()
 def info():
     """Get more information about kedro.
@@ -111,7 +119,7 @@ def info():
     plugin_versions = {}
     plugin_hooks = defaultdict(set)
     for hook, group in ENTRY_POINT_GROUPS.items():
-        for entry_point in pkg_resources.iter_entry_points(group=group):
+        for entry_point in _get_entry_points(group):
             module_name = entry_point.module_name.split(".")[0]
             plugin_version = pkg_resources.get_distribution(module_name).version
             plugin_versions[module_name] = plugin_version
@@ -536,9 +544,8 @@ def get_project_context(key: Any, default: Any = NO_DEFAULT) -> Any:  # pragma:
 
 
 def _get_plugin_command_groups(name):
-    entry_points = pkg_resources.iter_entry_points(group=ENTRY_POINT_GROUPS[name])
     command_groups = []
-    for entry_point in entry_points:
+    for entry_point in _get_entry_points(ENTRY_POINT_GROUPS[name]):
         try:
             command_groups.append(entry_point.load())
         except Exception:  # pylint: disable=broad-except
@@ -550,7 +557,7 @@ def _get_plugin_command_groups(name):
 
 def _init_plugins():
     group = ENTRY_POINT_GROUPS["init"]
-    for entry_point in pkg_resources.iter_entry_points(group=group):
+    for entry_point in _get_entry_points(group):
         try:
             init_hook = entry_point.load()
             init_hook()
@@ -29,6 +29,7 @@
 """ ``AbstractDataSet`` implementation to access JSON(L) files directly from
 Microsoft's Azure blob storage.
 """
+import gzip
 import io
 from typing import Any, Dict, Optional
 
@@ -37,12 +38,69 @@ from azure.storage.blob import BlockBlobService
 
 from kedro.io import AbstractDataSet
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pyarrow import json as pa_json
+    from pyarrow.lib import ArrowInvalid
+except ImportError:  # pyarrow<0.14
+    pa_json = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ``load_args`` and ``save_args`` for which json lines are parsed by
+# ``pyarrow`` or (de)serialised with ``orjson`` rather than going through pandas
+_RECORDS_LOAD_ARGS = ({"lines": True}, {"lines": True, "orient": "records"})
+_RECORDS_SAVE_ARGS = ({"lines": True, "orient": "records"},)
+_PA_JSON_BLOCK_SIZE = 1 << 20
+_DATETIME_DTYPES = ["datetime", "datetimetz", "timedelta"]
+_CODECS = ("json", "parquet", "feather")
+_COMPRESSIONS = ("gzip", "zstd")
+# blob metadata key recording the compression of a blob. It is not sent as
+# the HTTP ``Content-Encoding``, which HTTP clients decode on download
+_COMPRESSION_METADATA = "compression"
+
+
+def _check_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError(
+            "selected compression 'zstd' could not be "
+            "imported. Make sure zstandard is installed."
+        )
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data)
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    # the blob metadata decides, so a data set saving uncompressed
+    # blobs may still need zstandard to load one
+    _check_zstandard()
+    return zstandard.ZstdDecompressor().decompress(data)
+
 
 class JSONBlobDataSet(AbstractDataSet):
     # pylint: disable=too-many-instance-attributes
     """``JSONBlobDataSet`` loads and saves json(line-delimited) files in Microsoft's Azure
     blob storage. It uses Azure storage SDK to read and write in Azure and
-    pandas to handle the json(l) file locally.
+    pandas to handle the json(l) file locally. Utf-8 json lines in the "records"
+    orientation are serialised with ``orjson`` if it is installed. If
+    ``fast_json_lines`` is set, they are also parsed with ``pyarrow.json`` if
+    available (pyarrow>=0.14), or otherwise with ``orjson``.
+    Data can alternatively be stored in the columnar parquet or feather formats
+    by setting ``codec``, and the blob can be compressed by setting
+    ``compression``.
 
     Example:
     ::
@@ -69,6 +127,9 @@ class JSONBlobDataSet(AbstractDataSet):
             blob_from_bytes_args=self._blob_from_bytes_args,
             load_args=self._load_args,
             save_args=self._save_args,
+            codec=self._codec,
+            compression=self._compression,
+            fast_json_lines=self._fast_json_lines,
         )
 
     # pylint: disable=too-many-arguments
@@ -82,6 +143,9 @@ class JSONBlobDataSet(AbstractDataSet):
         blob_to_bytes_args: Optional[Dict[str, Any]] = None,
         load_args: Optional[Dict[str, Any]] = None,
         save_args: Optional[Dict[str, Any]] = None,
+        codec: str = "json",
+        compression: Optional[str] = None,
+        fast_json_lines: bool = False,
     ) -> None:
         """Creates a new instance of ``JSONBlobDataSet`` pointing to a
         concrete json(l) file on Azure blob storage.
@@ -93,11 +157,16 @@ class JSONBlobDataSet(AbstractDataSet):
                 ``account_key`` or ``sas_token``) to access the Azure blob
             encoding: Default utf-8. Defines encoding of json files downloaded as binary streams.
             blob_to_bytes_args: Any additional arguments to pass to Azure's
-                ``get_blob_to_bytes`` method:
-                https://docs.microsoft.com/en-us/python/api/azure.storage.blob.baseblobservice.baseblobservice?view=azure-python#get-blob-to-bytes
+                ``get_blob_to_stream`` method:
+                https://docs.microsoft.com/en-us/python/api/azure.storage.blob.baseblobservice.baseblobservice?view=azure-python#get-blob-to-stream
+                All defaults are preserved, but "max_connections", which is set to 4.
             blob_from_bytes_args: Any additional arguments to pass to Azure's
-                ``create_blob_from_bytes`` method:
-                https://docs.microsoft.com/en-us/python/api/azure.storage.blob.blockblobservice.blockblobservice?view=azure-python#create-blob-from-bytes
+                ``create_blob_from_stream`` method:
+                https://docs.microsoft.com/en-us/python/api/azure.storage.blob.blockblobservice.blockblobservice?view=azure-python#create-blob-from-stream
+                All defaults are preserved, but "max_connections", which is
+                set to 4, so that blocks are uploaded in parallel. The
+                "index" and "count" arguments of ``create_blob_from_bytes``
+                are still accepted, and select the part of the blob uploaded.
             load_args: Pandas options for loading json(l) files.
                 Here you can find all available arguments:
                 https://pandas.pydata.org/pandas-docs/stable/generated/pandas.read_json.html
@@ -106,36 +175,183 @@ class JSONBlobDataSet(AbstractDataSet):
                 Here you can find all available arguments:
                 https://pandas.pydata.org/pandas-docs/stable/generated/pandas.DataFrame.to_json.html
                 All defaults are preserved, but "index", which is set to False.
+            codec: Format of the blob, must be one of ['json', 'parquet',
+                'feather']. With a columnar format, ``load_args`` and
+                ``save_args`` are passed to the corresponding pandas
+                ``read_*`` and ``to_*`` methods instead, so e.g. only a
+                subset of ``columns`` can be loaded from a parquet blob.
+            compression: If specified, must be one of ['gzip', 'zstd'].
+                The saved blob is compressed and the compression recorded
+                in its "compression" metadata. Blobs are decompressed on
+                load based on that metadata, regardless of this setting.
+            fast_json_lines: Whether to parse json lines with ``pyarrow.json``
+                or ``orjson``, when ``load_args`` are ``{"lines": True}``.
+                Column types are then inferred by those libraries: unlike
+                ``pandas.read_json``, date columns are not converted, and
+                ``pyarrow`` parses ISO date strings as timestamps and
+                integers above 2**63 as floats. Json lines ``pyarrow``
+                cannot parse, e.g. with a column changing type, are loaded
+                with ``pandas.read_json``.
+
+        Raises:
+            ValueError: If 'codec' is not one of ['json', 'parquet', 'feather']
+                or 'compression' is not one of ['gzip', 'zstd'].
+            ImportError: If 'compression' is 'zstd' and ``zstandard``
+                could not be imported. Loading a zstd compressed blob without
+                ``zstandard`` raises a ``DataSetError`` instead.
 
         """
-        self._save_args = (
-            {**save_args} if save_args else {}
-        )
+        if codec not in _CODECS:
+            raise ValueError(
+                "codec should be one of {}, got {}".format(list(_CODECS), codec)
+            )
+        if compression is not None and compression not in _COMPRESSIONS:
+            raise ValueError(
+                "compression should be one of {}, got {}".format(
+                    list(_COMPRESSIONS), compression
+                )
+            )
+        if compression == "zstd":
+            _check_zstandard()
+        self._save_args = dict(save_args) if save_args else {}
         self._load_args = load_args if load_args else {}
         self._filepath = filepath
         self._encoding = encoding
+        self._codec = codec
+        self._compression = compression
+        self._fast_json_lines = fast_json_lines
         self._container_name = container_name
         self._credentials = credentials if credentials else {}
-        self._blob_to_bytes_args = blob_to_bytes_args if blob_to_bytes_args else {}
-        self._blob_from_bytes_args = blob_from_bytes_args if blob_from_bytes_args else {}
+        default_blob_to_bytes_args = {"max_connections": 4}
+        self._blob_to_bytes_args = (
+            {**default_blob_to_bytes_args, **blob_to_bytes_args}
+            if blob_to_bytes_args
+            else default_blob_to_bytes_args
+        )
+        default_blob_from_bytes_args = {"max_connections": 4}
+        self._blob_from_bytes_args = (
+            {**default_blob_from_bytes_args, **blob_from_bytes_args}
+            if blob_from_bytes_args
+            else default_blob_from_bytes_args
+        )
+        self.__blob_service = None  # type: Optional[BlockBlobService]
+
+    @property
+    def _blob_service(self) -> BlockBlobService:
+        # reuse the client (and its HTTPS connection pool) across loads and saves
+        if self.__blob_service is None:
+            self.__blob_service = BlockBlobService(**self._credentials)
+        return self.__blob_service
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the cached client is process-local, so it is never pickled
+        state = self.__dict__.copy()
+        state["_JSONBlobDataSet__blob_service"] = None
+        return state
 
     def _load(self) -> pd.DataFrame:
+        # download straight into the buffer pandas reads from, so the
+        # payload is not copied again into an intermediate bytes object
+        bytes_stream = io.BytesIO()
+        blob = self._blob_service.get_blob_to_stream(
+            container_name=self._container_name,
+            blob_name=self._filepath,
+            stream=bytes_stream,
+            **self._blob_to_bytes_args
+        )
+        bytes_stream.seek(0)
+
+        compression = (blob.metadata or {}).get(_COMPRESSION_METADATA)
+        if compression in _COMPRESSIONS:
+            bytes_stream = io.BytesIO(_decompress(bytes_stream.getvalue(), compression))
 
-        blob_service = BlockBlobService(**self._credentials)
+        if self._codec == "parquet":
+            return pd.read_parquet(bytes_stream, engine="pyarrow", **self._load_args)
+        if self._codec == "feather":
+            return pd.read_feather(bytes_stream, **self._load_args)
 
-        blob = blob_service.get_blob_to_bytes(
-            container_name=self._container_name, blob_name=self._filepath,
-            **self._blob_to_bytes_args)
-        bytes_stream = io.BytesIO(blob.content)
+        if (
+            self._fast_json_lines
+            and self._is_utf8
+            and self._load_args in _RECORDS_LOAD_ARGS
+        ):
+            if pa_json is not None:
+                read_options = pa_json.ReadOptions(
+                    use_threads=True, block_size=_PA_JSON_BLOCK_SIZE
+                )
+                try:
+                    table = pa_json.read_json(bytes_stream, read_options=read_options)
+                    return table.to_pandas()
+                except ArrowInvalid:
+                    bytes_stream.seek(0)
+            elif orjson is not None:
+                records = [
+                    orjson.loads(line)
+                    for line in bytes_stream.getvalue().splitlines()
+                    if line.strip()
+                ]
+                return pd.DataFrame.from_records(records)
 
         return pd.read_json(bytes_stream, encoding=self._encoding, **self._load_args)
 
     def _save(self, data: pd.DataFrame) -> None:
-        blob_service = BlockBlobService(**self._credentials)
+        payload = self._serialise(data)
+        blob_from_bytes_args = dict(self._blob_from_bytes_args)
+        # ``create_blob_from_stream`` takes neither, so the stream is
+        # positioned and sized as ``create_blob_from_bytes`` would slice it
+        index = blob_from_bytes_args.pop("index", 0)
+        count = blob_from_bytes_args.pop("count", None)
+        if self._compression:
+            payload = _compress(payload, self._compression)
+            metadata = {
+                **(blob_from_bytes_args.get("metadata") or {}),
+                _COMPRESSION_METADATA: self._compression,
+            }
+            blob_from_bytes_args = {**blob_from_bytes_args, "metadata": metadata}
 
-        blob_service.create_blob_from_bytes(
+        stream = io.BytesIO(payload)
+        stream.seek(index)
+        self._blob_service.create_blob_from_stream(
             container_name=self._container_name,
             blob_name=self._filepath,
-            blob=data.to_json(**self._save_args).encode(self._encoding),
-            **self._blob_from_bytes_args
+            stream=stream,
+            count=len(payload) - index if count is None else count,
+            **blob_from_bytes_args
         )
+
+    def _serialise(self, data: pd.DataFrame) -> bytes:
+        if self._codec != "json":
+            bytes_stream = io.BytesIO()
+            if self._codec == "parquet":
+                data.to_parquet(bytes_stream, engine="pyarrow", **self._save_args)
+            else:
+                data.to_feather(bytes_stream, **self._save_args)
+            return bytes_stream.getvalue()
+
+        # datetimes are written as epoch milliseconds by pandas, but as
+        # ISO strings by orjson, so such frames always go through pandas,
+        # and ``pandas.read_json`` converts them back to dates on load.
+        # Dates in object columns make orjson raise, so they do as well
+        if (
+            orjson is not None
+            and self._is_utf8
+            and self._save_args in _RECORDS_SAVE_ARGS
+            and data.select_dtypes(include=_DATETIME_DTYPES).columns.empty
+        ):
+            try:
+                return b"\n".join(
+                    orjson.dumps(
+                        record,
+                        option=orjson.OPT_SERIALIZE_NUMPY
+                        | orjson.OPT_PASSTHROUGH_DATETIME,
+                    )
+                    for record in data.to_dict(orient="records")
+                )
+            except orjson.JSONEncodeError:
+                pass
+        return data.to_json(**self._save_args).encode(self._encoding)
+
+    @property
+    def _is_utf8(self) -> bool:
+        # neither pyarrow nor orjson handle any other encoding
+        return self._encoding.lower().replace("-", "") == "utf8"
@@ -31,9 +31,10 @@ underlying functionality is supported by pandas HDFStore and PyTables,
 so it supports all allowed PyTables options for loading and saving hdf files.
 """
 from copy import deepcopy
-from functools import partial
-from pathlib import PurePosixPath
-from typing import Any, Dict, Optional
+from functools import lru_cache, partial
+from pathlib import PurePath, PurePosixPath
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Optional, Tuple
 
 import pandas as pd
 from s3fs import S3FileSystem
@@ -41,6 +42,39 @@ from s3fs import S3FileSystem
 from kedro.io.core import AbstractVersionedDataSet, DataSetError, Version
 
 HDFSTORE_DRIVER = "H5FD_CORE"
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+
+
+def _has_hdf5_signature(s3_file) -> bool:
+    """Checks for the HDF5 signature, which is at the start of the file or,
+    after a user block, at offset 512, 1024, 2048 and so on."""
+    offset = 0
+    while offset < s3_file.size:
+        s3_file.seek(offset)
+        if s3_file.read(len(HDF5_SIGNATURE)) == HDF5_SIGNATURE:
+            return True
+        offset = max(offset * 2, 512)
+    return False
+
+
+@lru_cache(maxsize=32)
+def _get_s3fs(credentials: Tuple[Tuple[str, Any], ...]) -> S3FileSystem:
+    return S3FileSystem(client_kwargs=dict(credentials))
+
+
+def _s3fs_for(credentials: Dict[str, Any]) -> S3FileSystem:
+    """Returns an ``S3FileSystem`` shared by all data sets using the same
+    credentials, so that they reuse one client and its connection pool.
+    Credentials with unhashable values get a file system of their own.
+    fsspec-based s3fs (>=0.3) already caches instances created with equal
+    arguments, so this only saves new clients with s3fs 0.2.x.
+    """
+    credentials_key = tuple(sorted(credentials.items()))
+    try:
+        hash(credentials_key)
+    except TypeError:
+        return S3FileSystem(client_kwargs=credentials)
+    return _get_s3fs(credentials_key)
 
 
 class HDFS3DataSet(AbstractVersionedDataSet):
@@ -88,7 +122,8 @@ class HDFS3DataSet(AbstractVersionedDataSet):
             bucket_name: S3 bucket name.
             key: Identifier to the group in the HDF store.
             credentials: Credentials to access the S3 bucket, such as
-                ``aws_access_key_id``, ``aws_secret_access_key``.
+                ``aws_access_key_id``, ``aws_secret_access_key``. Data sets
+                with the same credentials share one ``S3FileSystem``.
             load_args: PyTables options for loading hdf files.
                 Here you can find all available arguments:
                 https://www.pytables.org/usersguide/libref/top_level.html#tables.open_file
@@ -104,7 +139,7 @@ class HDFS3DataSet(AbstractVersionedDataSet):
 
         """
         _credentials = deepcopy(credentials) or {}
-        _s3 = S3FileSystem(client_kwargs=_credentials)
+        _s3 = _s3fs_for(_credentials)
         super().__init__(
             PurePosixPath("{}/{}".format(bucket_name, filepath)),
             version,
@@ -112,21 +147,12 @@ class HDFS3DataSet(AbstractVersionedDataSet):
             glob_function=partial(_s3.glob, refresh=True),
         )
 
-        default_load_args = {}  # type: Dict[str, Any]
-        default_save_args = {}  # type: Dict[str, Any]
         self._key = key
+        self._key_with_slash = "/" + key.lstrip("/")
         self._bucket_name = bucket_name
         self._credentials = _credentials
-        self._load_args = (
-            {**default_load_args, **load_args}
-            if load_args is not None
-            else default_load_args
-        )
-        self._save_args = (
-            {**default_load_args, **save_args}
-            if save_args is not None
-            else default_save_args
-        )
+        self._load_args = dict(load_args) if load_args else {}
+        self._save_args = dict(save_args) if save_args else {}
         self._s3 = _s3
 
     def _describe(self) -> Dict[str, Any]:
@@ -158,23 +184,19 @@ class HDFS3DataSet(AbstractVersionedDataSet):
     def _save(self, data: pd.DataFrame) -> None:
         save_path = PurePosixPath(self._get_save_path())
 
-        with pd.HDFStore(
-            str(self._filepath),
-            mode="w",
-            driver=HDFSTORE_DRIVER,
-            driver_core_backing_store=0,
-            **self._save_args,
-        ) as store:
-            store[self._key] = data
-            # pylint: disable=protected-access
-            binary_data = store._handle.get_file_image()
-
-        with self._s3.open(str(save_path), mode="wb") as s3_file:
-            # Only binary read and write modes are implemented for S3Files
-            s3_file.write(binary_data)
+        # the store is written to a local file and uploaded from there in
+        # blocks, instead of building a complete image of it in memory
+        with TemporaryDirectory() as temp_dir:
+            temp_path = str(PurePath(temp_dir) / self._filepath.name)
+            with pd.HDFStore(temp_path, mode="w", **self._save_args) as store:
+                store[self._key] = data
+            self._s3.put(temp_path, str(save_path))
 
-        load_path = PurePosixPath(self._get_load_path())
-        self._check_paths_consistency(load_path, save_path)
+        # an unversioned data set always loads from where it saves, while the
+        # latest version can only be looked up once the save has happened
+        if self._version:
+            load_path = PurePosixPath(self._get_load_path())
+            self._check_paths_consistency(load_path, save_path)
 
     def _exists(self) -> bool:
         try:
@@ -182,20 +204,29 @@ class HDFS3DataSet(AbstractVersionedDataSet):
         except DataSetError:
             return False
 
-        if self._s3.isfile(load_path):
+        # opening the file already fetches its metadata, so there is no
+        # need for a separate ``isfile`` request beforehand
+        try:
             with self._s3.open(load_path, mode="rb") as s3_file:
+                # probe the header first so that a file which is not hdf
+                # at all is not downloaded in full
+                if not _has_hdf5_signature(s3_file):
+                    return False
+                s3_file.seek(0)
                 binary_data = s3_file.read()
+        except FileNotFoundError:
+            return False
 
-            with pd.HDFStore(
-                str(self._filepath),
-                mode="r",
-                driver=HDFSTORE_DRIVER,
-                driver_core_backing_store=0,
-                driver_core_image=binary_data,
-                **self._load_args,
-            ) as store:
-                key_with_slash = (
-                    self._key if self._key.startswith("/") else "/" + self._key
-                )
-                return key_with_slash in store.keys()
-        return False
+        with pd.HDFStore(
+            str(self._filepath),
+            mode="r",
+            driver=HDFSTORE_DRIVER,
+            driver_core_backing_store=0,
+            driver_core_image=binary_data,
+            **self._load_args,
+        ) as store:
+            # a direct node lookup rather than a scan of all the store's keys;
+            # only groups written by pandas count, as ``keys()`` does
+            node = store.get_node(self._key_with_slash)
+            # pylint: disable=protected-access
+            return node is not None and "pandas_type" in node._v_attrs
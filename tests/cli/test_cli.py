@@ -27,14 +27,18 @@
 # limitations under the License.
 import json
 from os.path import join
-from pathlib import Path
 
 import click
 from mock import patch
 from pytest import fixture, mark, raises, warns
 
 from kedro import __version__ as version
-from kedro.cli.cli import _get_plugin_command_groups, _init_plugins, cli
+from kedro.cli.cli import (
+    _get_entry_points,
+    _get_plugin_command_groups,
+    _init_plugins,
+    cli,
+)
 from kedro.cli.utils import (
     CommandCollection,
     KedroCliError,
@@ -44,6 +48,20 @@ from kedro.cli.utils import (
 )
 
 PACKAGE_NAME = "my_project"
+REQUIREMENTS = "SQLAlchemy>=1.2.0, <2.0\npandas==0.23.0\ntoposort\n"
+
+
+def _cell(source, cell_type="code", tags=None):
+    metadata = {"tags": tags} if tags else {}
+    return {"cell_type": cell_type, "source": source, "metadata": metadata}
+
+
+def _node_cell(source, cell_type="code"):
+    return _cell(source, cell_type, tags=["node"])
+
+
+def _notebook(*cells):
+    return json.dumps({"cells": list(cells)})
 
 
 @click.group(name="stub_cli")
@@ -80,8 +98,7 @@ def invoke_result(cli_runner, request):
 
 @fixture
 def project_path(tmp_path):
-    temp = Path(str(tmp_path))
-    return Path(temp / "some/path/to/my_project")
+    return tmp_path / "some/path/to/my_project"
 
 
 @fixture
@@ -93,9 +110,8 @@ def nodes_path(project_path):
 
 @fixture
 def requirements_file(tmp_path):
-    body = "\n".join(["SQLAlchemy>=1.2.0, <2.0", "pandas==0.23.0", "toposort"]) + "\n"
     reqs_file = tmp_path / "requirements.txt"
-    reqs_file.write_text(body)
+    reqs_file.write_text(REQUIREMENTS)
     yield reqs_file
 
 
@@ -253,22 +269,10 @@ class TestCliUtils:
             get_pkg_version(non_existent_file, "pandas")
 
     def test_export_nodes(self, project_path, nodes_path):
-        nodes = json.dumps(
-            {
-                "cells": [
-                    {
-                        "cell_type": "code",
-                        "source": "print('hello world')",
-                        "metadata": {"tags": ["node"]},
-                    },
-                    {
-                        "cell_type": "code",
-                        "source": "print(10+5)",
-                        "metadata": {"tags": ["node"]},
-                    },
-                    {"cell_type": "code", "source": "a = 10", "metadata": {}},
-                ]
-            }
+        nodes = _notebook(
+            _node_cell("print('hello world')"),
+            _node_cell("print(10+5)"),
+            _cell("a = 10"),
         )
         notebook_file = project_path / "notebook.ipynb"
         notebook_file.write_text(nodes)
@@ -280,17 +284,7 @@ class TestCliUtils:
         assert output_path.read_text() == "print('hello world')\nprint(10+5)\n"
 
     def test_export_nodes_different_notebook_paths(self, project_path, nodes_path):
-        nodes = json.dumps(
-            {
-                "cells": [
-                    {
-                        "cell_type": "code",
-                        "source": "print('hello world')",
-                        "metadata": {"tags": ["node"]},
-                    }
-                ]
-            }
-        )
+        nodes = _notebook(_node_cell("print('hello world')"))
         notebook_file1 = project_path / "notebook1.ipynb"
         notebook_file1.write_text(nodes)
         output_path1 = nodes_path / "notebook1.py"
@@ -306,21 +300,8 @@ class TestCliUtils:
         assert output_path2.read_text() == "print('hello world')\n"
 
     def test_export_nodes_nothing_to_write(self, project_path, nodes_path):
-        nodes = json.dumps(
-            {
-                "cells": [
-                    {
-                        "cell_type": "code",
-                        "source": "print('hello world')",
-                        "metadata": {},
-                    },
-                    {
-                        "cell_type": "text",
-                        "source": "hello world",
-                        "metadata": {"tags": ["node"]},
-                    },
-                ]
-            }
+        nodes = _notebook(
+            _cell("print('hello world')"), _node_cell("hello world", cell_type="text")
         )
         notebook_file = project_path / "notebook.iypnb"
         notebook_file.write_text(nodes)
@@ -337,17 +318,7 @@ class TestCliUtils:
         existing_nodes.touch()
         existing_nodes.write_text("original")
 
-        nodes = json.dumps(
-            {
-                "cells": [
-                    {
-                        "cell_type": "code",
-                        "source": "print('hello world')",
-                        "metadata": {"tags": ["node"]},
-                    }
-                ]
-            }
-        )
+        nodes = _notebook(_node_cell("print('hello world')"))
         notebook_file = project_path / "notebook.iypnb"
         notebook_file.write_text(nodes)
 
@@ -370,7 +341,9 @@ class TestCliUtils:
 
 @fixture
 def entry_points(mocker):
-    return mocker.patch("pkg_resources.iter_entry_points")
+    _get_entry_points.cache_clear()
+    yield mocker.patch("pkg_resources.iter_entry_points")
+    _get_entry_points.cache_clear()
 
 
 @fixture
@@ -414,3 +387,10 @@ class TestEntryPoints:
         entry_point.load.side_effect = Exception()
         _init_plugins()
         entry_points.assert_called_once_with(group="kedro.init")
+
+    def test_entry_points_are_cached(self, entry_points, entry_point):
+        entry_point.load.return_value = "groups"
+        _get_plugin_command_groups("project")
+        groups = _get_plugin_command_groups("project")
+        assert groups == ["groups"]
+        entry_points.assert_called_once_with(group="kedro.project_commands")
@@ -28,10 +28,17 @@
 
 # pylint: disable=unused-argument
 
-from unittest.mock import patch
+import datetime
+import gzip
+import io
+import pickle
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import ANY, patch
 
 import pandas as pd
 import pytest
+from azure.storage.blob.models import Blob
 
 from kedro.contrib.io.azure import JSONBlobDataSet
 from kedro.io import DataSetError
@@ -48,16 +55,26 @@ def dummy_dataframe():
 
 @pytest.fixture
 def blob_json_data_set():
-    def make_data_set(load_args=None, save_args=None):
+    def make_data_set(
+        load_args=None,
+        save_args=None,
+        codec="json",
+        compression=None,
+        blob_from_bytes_args=None,
+        fast_json_lines=False,
+    ):
         return JSONBlobDataSet(
             filepath=TEST_FILE_NAME,
             container_name=TEST_CONTAINER_NAME,
             encoding="utf-8",
             blob_to_bytes_args={"to_extra": 42},
-            blob_from_bytes_args={"from_extra": 42},
+            blob_from_bytes_args=blob_from_bytes_args or {"from_extra": 42},
             credentials=TEST_CREDENTIALS,
             load_args=load_args,
             save_args=save_args,
+            codec=codec,
+            compression=compression,
+            fast_json_lines=fast_json_lines,
         )
 
     return make_data_set
@@ -84,7 +101,27 @@ def test_pass_credentials_save(blob_service, blob_json_data_set, dummy_dataframe
     )
 
 
-@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_bytes")
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService")
+def test_blob_service_is_reused(blob_service, blob_json_data_set, dummy_dataframe):
+    data_set = blob_json_data_set()
+    data_set.save(dummy_dataframe)
+    data_set.save(dummy_dataframe)
+    blob_service.assert_called_once_with(
+        account_name="ACCOUNT_NAME", account_key="ACCOUNT_KEY"
+    )
+
+
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_stream")
+def test_pickle_drops_blob_service(blob_from_mock, blob_json_data_set, dummy_dataframe):
+    data_set = blob_json_data_set()
+    data_set.save(dummy_dataframe)
+    unpickled = pickle.loads(pickle.dumps(data_set))
+    assert unpickled._describe() == data_set._describe()
+    # pylint: disable=protected-access
+    assert unpickled.__dict__["_JSONBlobDataSet__blob_service"] is None
+
+
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_stream")
 def test_load_blob_args(get_blob_mock, blob_json_data_set):
     try:
         blob_json_data_set().load()
@@ -92,73 +129,152 @@ def test_load_blob_args(get_blob_mock, blob_json_data_set):
         pass
 
     get_blob_mock.assert_called_with(
-        container_name=TEST_CONTAINER_NAME, blob_name=TEST_FILE_NAME, to_extra=42
+        container_name=TEST_CONTAINER_NAME,
+        blob_name=TEST_FILE_NAME,
+        stream=ANY,
+        max_connections=4,
+        to_extra=42,
     )
 
 
-class BlobMock:
-    def __init__(self):
-        self._content = '{"name": ["tom", "bob"], "age": [3, 4]}\n'.encode("utf-8")
+def mock_load_func(content):
+    def mocked(*args, stream, **kwargs):
+        stream.write(content)
+        return Blob()
 
-    @property
-    def content(self):
-        return self._content
+    return mocked
 
 
-def mock_load_func():
-    def mocked(*args, **kwargs):
-        return BlobMock()
+@pytest.fixture
+def blob_store():
+    """Patches ``BlockBlobService`` so that saved blobs are kept in memory
+    and can be loaded back."""
+    blobs = {}
 
-    return mocked
+    def create_blob_from_stream(
+        *args, blob_name, stream, count, metadata=None, **kwargs
+    ):
+        blobs[blob_name] = Blob(content=stream.read(count), metadata=metadata)
 
+    def get_blob_to_stream(*args, blob_name, stream, **kwargs):
+        stream.write(blobs[blob_name].content)
+        return blobs[blob_name]
 
-@patch(
-    "kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_bytes",
-    new_callable=mock_load_func,
-)
-def test_load(get_blob_mock, blob_json_data_set):
-    result = blob_json_data_set().load()[["name", "age"]]
-    expected = pd.DataFrame({"name": ["tom", "bob"], "age": [3, 4]})
-    expected = expected[["name", "age"]]
-    assert result.equals(expected)
+    with patch("kedro.contrib.io.azure.json_blob.BlockBlobService") as blob_service:
+        service = blob_service.return_value
+        service.create_blob_from_stream.side_effect = create_blob_from_stream
+        service.get_blob_to_stream.side_effect = get_blob_to_stream
+        yield blobs
 
 
-class BlobMockDelimited:
-    def __init__(self):
-        self._content = '{"name": "tom", "age": 3}\n{"name": "bob", "age": 4}\n'.encode("utf-8")
+class _BlobRequestHandler(BaseHTTPRequestHandler):
+    """Serves blobs uploaded in a single put, like the blob storage REST API
+    does, including the ``Content-Encoding`` set for them."""
 
-    @property
-    def content(self):
-        return self._content
+    blobs = None  # type: dict
 
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
 
-def mock_load_delimited_func():
-    def mocked(*args, **kwargs):
-        return BlobMockDelimited()
+    def _send_headers(self, status, headers, content_length=0):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(content_length))
+        self.send_header("ETag", '"0x1"')
+        self.send_header("Last-Modified", "Wed, 01 Jan 2020 00:00:00 GMT")
+        self.end_headers()
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        content = self.rfile.read(int(self.headers["Content-Length"]))
+        headers = {
+            name: value
+            for name, value in self.headers.items()
+            if name.lower().startswith("x-ms-meta-")
+        }
+        content_encoding = self.headers.get("x-ms-blob-content-encoding")
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        self.blobs[self.path] = (content, headers)
+        self._send_headers(201, {})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        content, headers = self.blobs[self.path]
+        headers = {
+            **headers,
+            "x-ms-blob-type": "BlockBlob",
+            "Content-Range": "bytes 0-{}/{}".format(len(content) - 1, len(content)),
+        }
+        self._send_headers(206, headers, len(content))
+        self.wfile.write(content)
 
-    return mocked
+
+@pytest.fixture
+def blob_server():
+    """Serves blobs over HTTP, so that data sets go through the response
+    handling of the Azure SDK. Yields the blobs by path, and the credentials
+    pointing a data set to the server."""
+    handler = type("BlobRequestHandler", (_BlobRequestHandler,), {"blobs": {}})
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    credentials = {
+        "account_name": "ACCOUNT_NAME",
+        "account_key": "QUNDT1VOVF9LRVk=",
+        "custom_domain": "http://127.0.0.1:{}".format(server.server_port),
+        "protocol": "http",
+    }
+    yield handler.blobs, credentials
+    server.shutdown()
+    server.server_close()
 
 
 @patch(
-    "kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_bytes",
-    new_callable=mock_load_delimited_func,
+    "kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_stream",
+    new=mock_load_func('{"name": ["tom", "bob"], "age": [3, 4]}\n'.encode("utf-8")),
 )
-def test_load_delimited(get_blob_mock, blob_json_data_set):
+def test_load(blob_json_data_set):
+    result = blob_json_data_set().load()[["name", "age"]]
+    expected = pd.DataFrame({"name": ["tom", "bob"], "age": [3, 4]})
+    expected = expected[["name", "age"]]
+    assert result.equals(expected)
+
+
+@patch(
+    "kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_stream",
+    new=mock_load_func(
+        '{"name": "tom", "age": 3}\n{"name": "bob", "age": 4}\n'.encode("utf-8")
+    ),
+)
+def test_load_delimited(blob_json_data_set):
     result = blob_json_data_set(load_args={"lines": True}).load()[["name", "age"]]
     expected = pd.DataFrame({"name": ["tom", "bob"], "age": [3, 4]})
     expected = expected[["name", "age"]]
     assert result.equals(expected)
 
 
-@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_bytes")
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_stream")
 def test_save_blob_args(blob_from_mock, blob_json_data_set, dummy_dataframe):
     blob_json_data_set().save(dummy_dataframe)
+    payload = dummy_dataframe.to_json().encode("utf-8")
     blob_from_mock.assert_called_with(
         container_name=TEST_CONTAINER_NAME,
         blob_name=TEST_FILE_NAME,
-        blob=dummy_dataframe.to_json().encode("utf-8"),
+        stream=ANY,
+        count=len(payload),
+        max_connections=4,
         from_extra=42,
     )
+    assert blob_from_mock.call_args[1]["stream"].getvalue() == payload
+
+
+def test_save_bytes_index_and_count(blob_store, blob_json_data_set, dummy_dataframe):
+    """Test that ``index`` and ``count`` of ``create_blob_from_bytes`` still
+    select the part of the payload which is uploaded."""
+    data_set = blob_json_data_set(blob_from_bytes_args={"index": 2, "count": 5})
+    data_set.save(dummy_dataframe)
+    payload = dummy_dataframe.to_json().encode("utf-8")
+    assert blob_store[TEST_FILE_NAME].content == payload[2:7]
 
 
 def test_str_representation(blob_json_data_set):
@@ -166,3 +282,202 @@ def test_str_representation(blob_json_data_set):
     assert "JSONBlobDataSet" in str(data_set)
     assert TEST_CREDENTIALS["account_name"] not in str(data_set)
     assert TEST_CREDENTIALS["account_key"] not in str(data_set)
+
+
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_stream")
+def test_save_records_orjson(blob_from_mock, blob_json_data_set, dummy_dataframe):
+    pytest.importorskip("orjson")
+    save_args = {"orient": "records", "lines": True}
+    blob_json_data_set(save_args=save_args).save(dummy_dataframe)
+    reloaded = pd.read_json(blob_from_mock.call_args[1]["stream"], lines=True)
+    assert reloaded.equals(dummy_dataframe)
+
+
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_stream")
+def test_save_records_object_dates(blob_from_mock, blob_json_data_set):
+    """Test that dates in object columns are written by pandas, as epoch
+    milliseconds, rather than as ISO strings by orjson."""
+    pytest.importorskip("orjson")
+    data = pd.DataFrame({"date": [datetime.date(2019, 1, 1)]})
+    save_args = {"orient": "records", "lines": True}
+    blob_json_data_set(save_args=save_args).save(data)
+    payload = data.to_json(**save_args).encode("utf-8")
+    assert blob_from_mock.call_args[1]["stream"].getvalue() == payload
+
+
+@patch("kedro.contrib.io.azure.json_blob.orjson", None)
+@patch("kedro.contrib.io.azure.json_blob.BlockBlobService.create_blob_from_stream")
+def test_save_records_no_orjson(blob_from_mock, blob_json_data_set, dummy_dataframe):
+    save_args = {"orient": "records", "lines": True}
+    blob_json_data_set(save_args=save_args).save(dummy_dataframe)
+    payload = dummy_dataframe.to_json(**save_args).encode("utf-8")
+    assert blob_from_mock.call_args[1]["stream"].getvalue() == payload
+
+
+@pytest.mark.parametrize(
+    "backend,patched_out", [("orjson", "pa_json"), ("pyarrow.json", "orjson")]
+)
+@patch(
+    "kedro.contrib.io.azure.json_blob.BlockBlobService.get_blob_to_stream",
+    new=mock_load_func(
+        '{"name": "tom", "age": 3}\n{"name": "bob", "age": 4}\n'.encode("utf-8")
+    ),
+)
+def test_load_delimited_fast(blob_json_data_set, mocker, backend, patched_out):
+    """Test parsing json lines with each of the ``fast_json_lines`` backends,
+    by patching out the other one."""
+    pytest.importorskip(backend)
+    mocker.patch("kedro.contrib.io.azure.json_blob." + patched_out, None)
+    data_set = blob_json_data_set(load_args={"lines": True}, fast_json_lines=True)
+    result = data_set.load()[["name", "age"]]
+    expected = pd.DataFrame({"name": ["tom", "bob"], "age": [3, 4]})
+    expected = expected[["name", "age"]]
+    assert result.equals(expected)
+
+
+@pytest.mark.usefixtures("blob_store")
+def test_save_and_load_records_dates(blob_json_data_set):
+    """Test that dates saved as json lines are loaded back as dates."""
+    data = pd.DataFrame(
+        {"date": pd.to_datetime(["2019-01-01", "2019-01-02"]), "col1": [1, 2]}
+    )
+    data_set = blob_json_data_set(
+        load_args={"lines": True}, save_args={"orient": "records", "lines": True}
+    )
+    data_set.save(data)
+    assert data_set.load().equals(data)
+
+
+@pytest.mark.parametrize("fast_json_lines", [False, True])
+def test_load_delimited_mixed_types(blob_store, blob_json_data_set, fast_json_lines):
+    """Test that json lines with a column changing type are loaded by
+    pandas, even when ``pyarrow`` is asked to parse them."""
+    blob_store[TEST_FILE_NAME] = Blob(
+        content=b'{"a": 1}\n{"a": 1}\n{"a": 1}\n{"a": "x"}\n'
+    )
+    data_set = blob_json_data_set(
+        load_args={"lines": True}, fast_json_lines=fast_json_lines
+    )
+    assert data_set.load()["a"].tolist() == [1, 1, 1, "x"]
+
+
+@pytest.mark.parametrize(
+    "content,dtype",
+    [
+        (b'{"a": "2019-01-01"}\n{"a": "2019-01-02"}\n', "object"),
+        (b'{"a": 18446744073709551615}\n{"a": 1}\n', "uint64"),
+        (b'{"date": 1546300800000}\n{"date": 1546387200000}\n', "datetime64[ns]"),
+    ],
+    ids=["iso_strings", "big_integers", "epoch_dates"],
+)
+def test_load_delimited_pandas_dtypes(blob_store, blob_json_data_set, content, dtype):
+    """Test that json lines get the column types of ``pandas.read_json``
+    by default."""
+    blob_store[TEST_FILE_NAME] = Blob(content=content)
+    data_set = blob_json_data_set(load_args={"lines": True})
+    assert data_set.load().dtypes.iloc[0] == dtype
+
+
+def test_invalid_codec(blob_json_data_set):
+    pattern = r"codec should be one of \['json', 'parquet', 'feather'\], got csv"
+    with pytest.raises(ValueError, match=pattern):
+        blob_json_data_set(codec="csv")
+
+
+@pytest.mark.parametrize("codec", ["parquet", "feather"])
+@pytest.mark.usefixtures("blob_store")
+def test_save_and_load_columnar(codec, blob_json_data_set, dummy_dataframe):
+    data_set = blob_json_data_set(codec=codec)
+    data_set.save(dummy_dataframe)
+    assert data_set.load().equals(dummy_dataframe)
+
+
+def test_load_parquet_columns(blob_store, blob_json_data_set, dummy_dataframe):
+    bytes_stream = io.BytesIO()
+    dummy_dataframe.to_parquet(bytes_stream)
+    blob_store[TEST_FILE_NAME] = Blob(content=bytes_stream.getvalue())
+    data_set = blob_json_data_set(
+        load_args={"columns": ["col1", "col3"]}, codec="parquet"
+    )
+    assert data_set.load().equals(dummy_dataframe[["col1", "col3"]])
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_save_and_load_compressed(
+    blob_store, compression, blob_json_data_set, dummy_dataframe
+):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    data_set = blob_json_data_set(compression=compression)
+    data_set.save(dummy_dataframe)
+    blob = blob_store[TEST_FILE_NAME]
+    assert blob.metadata == {"compression": compression}
+    assert blob.content != dummy_dataframe.to_json().encode("utf-8")
+    assert data_set.load().equals(dummy_dataframe)
+
+
+def test_compression_keeps_metadata(blob_store, blob_json_data_set, dummy_dataframe):
+    metadata = {"owner": "kedro"}
+    blob_json_data_set(
+        blob_from_bytes_args={"metadata": metadata}, compression="gzip"
+    ).save(dummy_dataframe)
+    saved_metadata = blob_store[TEST_FILE_NAME].metadata
+    assert saved_metadata == {"owner": "kedro", "compression": "gzip"}
+    assert metadata == {"owner": "kedro"}
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_save_and_load_compressed_over_http(blob_server, compression, dummy_dataframe):
+    """Test that compressed blobs round-trip through the Azure SDK, which
+    decodes any ``Content-Encoding`` of a downloaded blob."""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    blobs, credentials = blob_server
+    data_set = JSONBlobDataSet(
+        filepath=TEST_FILE_NAME,
+        container_name=TEST_CONTAINER_NAME,
+        credentials=credentials,
+        compression=compression,
+    )
+    data_set.save(dummy_dataframe)
+    content, headers = blobs["/{}/{}".format(TEST_CONTAINER_NAME, TEST_FILE_NAME)]
+    assert "Content-Encoding" not in headers
+    assert content != dummy_dataframe.to_json().encode("utf-8")
+    assert data_set.load().equals(dummy_dataframe)
+
+
+def test_load_content_encoded_over_http(blob_server, dummy_dataframe):
+    """Test loading a blob stored with a gzip ``Content-Encoding``, which
+    the Azure SDK hands over already decompressed."""
+    blobs, credentials = blob_server
+    blobs["/{}/{}".format(TEST_CONTAINER_NAME, TEST_FILE_NAME)] = (
+        gzip.compress(dummy_dataframe.to_json().encode("utf-8")),
+        {"Content-Encoding": "gzip"},
+    )
+    data_set = JSONBlobDataSet(
+        filepath=TEST_FILE_NAME,
+        container_name=TEST_CONTAINER_NAME,
+        credentials=credentials,
+    )
+    assert data_set.load().equals(dummy_dataframe)
+
+
+def test_invalid_compression(blob_json_data_set):
+    pattern = r"compression should be one of \['gzip', 'zstd'\], got bz2"
+    with pytest.raises(ValueError, match=pattern):
+        blob_json_data_set(compression="bz2")
+
+
+@patch("kedro.contrib.io.azure.json_blob.zstandard", None)
+def test_zstd_not_installed(blob_json_data_set):
+    pattern = "selected compression 'zstd' could not be imported"
+    with pytest.raises(ImportError, match=pattern):
+        blob_json_data_set(compression="zstd")
+
+
+@patch("kedro.contrib.io.azure.json_blob.zstandard", None)
+def test_load_zstd_not_installed(blob_store, blob_json_data_set):
+    blob_store[TEST_FILE_NAME] = Blob(content=b"", metadata={"compression": "zstd"})
+    pattern = "selected compression 'zstd' could not be imported"
+    with pytest.raises(DataSetError, match=pattern):
+        blob_json_data_set().load()
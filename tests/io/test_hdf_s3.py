@@ -26,6 +26,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from multiprocessing.reduction import ForkingPickler
+from pathlib import Path
 
 import pytest
 import s3fs
@@ -35,6 +36,7 @@ from pandas.util.testing import assert_frame_equal
 
 from kedro.io import DataSetError, HDFS3DataSet
 from kedro.io.core import Version
+from kedro.io.hdf_s3 import _get_s3fs
 
 BUCKET_NAME = "test_bucket"
 FILENAME = "test.hdf"
@@ -43,6 +45,15 @@ AWS_CREDENTIALS = dict(
 )
 
 
+@pytest.fixture
+def clear_s3fs_cache():
+    """Make sure a file system cached by a previous test is not returned
+    instead of the patched ``S3FileSystem``."""
+    _get_s3fs.cache_clear()
+    yield
+    _get_s3fs.cache_clear()
+
+
 @pytest.fixture
 def hdf_data_set():
     return HDFS3DataSet(
@@ -131,6 +142,18 @@ class TestHDFS3DataSet:
 
         assert_frame_equal(reloaded_df, dummy_dataframe)
 
+    @pytest.mark.usefixtures("mocked_s3_bucket")
+    def test_save_uploads_temp_file(self, hdf_data_set, dummy_dataframe, mocker):
+        """Test that the hdf file is written locally, uploaded and cleaned up."""
+        # pylint: disable=protected-access
+        put = mocker.spy(hdf_data_set._s3, "put")
+        hdf_data_set.save(dummy_dataframe)
+
+        temp_path, s3_path = put.call_args[0]
+        assert Path(temp_path).name == FILENAME
+        assert s3_path == "{}/{}".format(BUCKET_NAME, FILENAME)
+        assert not Path(temp_path).exists()
+
     @pytest.mark.usefixtures("mocked_s3_bucket")
     def test_load_missing(self, hdf_data_set):
         """Check the error when trying to load missing hdf file."""
@@ -157,6 +180,45 @@ class TestHDFS3DataSet:
         )
         assert not data_set2.exists()
 
+    @pytest.mark.usefixtures("mocked_s3_bucket")
+    def test_exists_parent_group(self, dummy_dataframe):
+        """Test that a group which only holds other keys does not exist."""
+        HDFS3DataSet(
+            filepath=FILENAME,
+            bucket_name=BUCKET_NAME,
+            key="parent/test_hdf",
+            credentials=AWS_CREDENTIALS,
+        ).save(dummy_dataframe)
+        for key, exists in [("/parent/test_hdf", True), ("parent", False)]:
+            data_set = HDFS3DataSet(
+                filepath=FILENAME,
+                bucket_name=BUCKET_NAME,
+                key=key,
+                credentials=AWS_CREDENTIALS,
+            )
+            assert data_set.exists() is exists
+
+    def test_exists_not_hdf(self, hdf_data_set, mocked_s3_bucket, dummy_dataframe):
+        """Test `exists` method invocation when the file is not hdf."""
+        mocked_s3_bucket.put_object(
+            Bucket=BUCKET_NAME, Key=FILENAME, Body=dummy_dataframe.to_csv()
+        )
+        assert not hdf_data_set.exists()
+
+    @pytest.mark.usefixtures("mocked_s3_bucket")
+    def test_exists_user_block(self, dummy_dataframe):
+        """Test `exists` method invocation when the hdf signature follows
+        a user block."""
+        data_set = HDFS3DataSet(
+            filepath=FILENAME,
+            bucket_name=BUCKET_NAME,
+            credentials=AWS_CREDENTIALS,
+            key="test_hdf",
+            save_args={"USER_BLOCK_SIZE": 512},
+        )
+        data_set.save(dummy_dataframe)
+        assert data_set.exists()
+
     @pytest.mark.usefixtures("mocked_s3_bucket")
     def test_overwrite_if_exists(self, hdf_data_set, dummy_dataframe):
         """Test overriding existing hdf file."""
@@ -170,6 +232,58 @@ class TestHDFS3DataSet:
     def test_serializable(self, hdf_data_set):
         ForkingPickler.dumps(hdf_data_set)
 
+    @pytest.mark.usefixtures("clear_s3fs_cache")
+    def test_shared_s3fs(self, mocker):
+        """Test that data sets with the same credentials share a file system."""
+        s3fs_mock = mocker.patch("kedro.io.hdf_s3.S3FileSystem")
+        data_set1 = HDFS3DataSet(
+            filepath=FILENAME,
+            bucket_name=BUCKET_NAME,
+            credentials=AWS_CREDENTIALS,
+            key="test_hdf",
+        )
+        data_set2 = HDFS3DataSet(
+            filepath="other.hdf",
+            bucket_name=BUCKET_NAME,
+            credentials=dict(AWS_CREDENTIALS),
+            key="test_hdf",
+        )
+        s3fs_mock.assert_called_once_with(client_kwargs=AWS_CREDENTIALS)
+        # pylint: disable=protected-access
+        assert data_set2._s3 is data_set1._s3
+
+    @pytest.mark.usefixtures("clear_s3fs_cache")
+    def test_different_credentials(self, mocker):
+        """Test that data sets with different credentials do not share
+        a file system."""
+        s3fs_mock = mocker.patch("kedro.io.hdf_s3.S3FileSystem")
+        other_credentials = {**AWS_CREDENTIALS, "region_name": "eu-west-1"}
+        for credentials in (AWS_CREDENTIALS, other_credentials):
+            HDFS3DataSet(
+                filepath=FILENAME,
+                bucket_name=BUCKET_NAME,
+                credentials=credentials,
+                key="test_hdf",
+            )
+        assert s3fs_mock.call_args_list == [
+            mocker.call(client_kwargs=AWS_CREDENTIALS),
+            mocker.call(client_kwargs=other_credentials),
+        ]
+
+    @pytest.mark.usefixtures("clear_s3fs_cache")
+    def test_unhashable_credentials(self, mocker):
+        """Test that unhashable credentials bypass the file system cache."""
+        s3fs_mock = mocker.patch("kedro.io.hdf_s3.S3FileSystem")
+        credentials = {"config_kwargs": {"retries": 3}}
+        HDFS3DataSet(
+            filepath=FILENAME,
+            bucket_name=BUCKET_NAME,
+            credentials=credentials,
+            key="test_hdf",
+        )
+        s3fs_mock.assert_called_once_with(client_kwargs=credentials)
+        assert _get_s3fs.cache_info().currsize == 0
+
 
 class TestHDFS3DataSetVersioned:
     @pytest.mark.usefixtures("mocked_s3_object")